@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import threading
+import time
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.table import Table, TableStyleInfo
@@ -10,6 +12,10 @@ from openpyxl.worksheet.table import Table, TableStyleInfo
 DB_SERVER = 'SBNC-sql'
 DB_NAME = 'NGProd'
 ODBC_DRIVER = 'ODBC Driver 17 for SQL Server'
+# Optional SQLAlchemy URL override (e.g. sqlite:///stand_in.db for local testing)
+DB_URL = os.environ.get('PROV_PROD_DB_URL')
+# How long the small lookup tables (categories, templates, resources) stay cached
+DIMENSION_TTL_SECONDS = int(os.environ.get('PROV_PROD_DIMENSION_TTL', '86400'))
 
 
 # --- Prompt Date Input ---
@@ -53,7 +59,10 @@ def export_to_excel(df, output_path, sheet_name="Results"):
 
 
 # --- Connection Builder ---
-def get_engine():
+def get_engine(db_url=None):
+    db_url = db_url or DB_URL
+    if db_url:
+        return create_engine(db_url)
     conn_str = (
         f"mssql+pyodbc://@{DB_SERVER}/{DB_NAME}"
         f"?driver={ODBC_DRIVER.replace(' ', '+')}&Trusted_Connection=yes"
@@ -76,41 +85,177 @@ def run_query_and_export(sql_query, file_name, sheet_name="Results"):
         print(f"[!] ERROR: {e}")
 
 
-# --- Main Template Query ---
-def run_main_template_query():
-    lower_date = prompt_date("Enter the LOWER limit date")
-    upper_date = prompt_date("Enter the date of the last SUNDAY that passed (Upper limit)")
-    upper_date_adj = upper_date - timedelta(days=1)
+# --- Week Start Filter Expression ---
+# NGProd compares week_start_date as YYYYMMDD text; other backends (the SQLite
+# stand-in) may hold it as 'YYYYMMDD' or 'YYYY-MM-DD', so normalise both.
+def week_start_sql(engine):
+    if engine.dialect.name == "mssql":
+        return "CONVERT(VARCHAR, r.week_start_date, 112)"
+    return "REPLACE(SUBSTR(CAST(r.week_start_date AS VARCHAR(32)), 1, 10), '-', '')"
 
-    lower_str_sql = lower_date.strftime("%Y%m%d")
-    upper_str_sql = upper_date_adj.strftime("%Y%m%d")
-    file_date_range = f"{lower_date.strftime('%Y-%m-%d')} to {upper_date.strftime('%Y-%m-%d')}"
-    output_file = fr'C:\Reports\Provider Prod Data Pulls\Prov Prod Data {file_date_range}.xlsx'
 
-    sql_query = f"""
+# --- Dimension Cache (categories, appt_templates, resources) ---
+# These tables are tiny and rarely change, so they are loaded once per engine and
+# the fact query only ships integer keys. An unseen key forces a reload, which
+# picks up newly created categories/templates/providers before the TTL expires.
+# Keys still missing after that reload are orphans (the old INNER JOINs dropped
+# them too); they are remembered so they do not trigger reloads again until the
+# TTL expires or the cache is invalidated.
+DIMENSION_QUERIES = {
+    "categories": "SELECT category_id, category, prevent_appts_ind FROM categories",
+    "appt_templates": "SELECT appt_template_id, template FROM appt_templates",
+    "resources": "SELECT resource_id, description FROM resources",
+}
+DIMENSION_KEYS = {
+    "categories": "category_id",
+    "appt_templates": "appt_template_id",
+    "resources": "resource_id",
+}
+
+
+class DimensionCache:
+    def __init__(self, ttl_seconds=DIMENSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._orphans = {}
+
+    def _load(self, engine):
+        tables = {
+            name: pd.read_sql(text(query), engine).set_index(DIMENSION_KEYS[name])
+            for name, query in DIMENSION_QUERIES.items()
+        }
+        # pandas builds an index's hash table lazily and not thread-safely; build it
+        # here, under the lock, before the tables are shared between request threads
+        for table in tables.values():
+            table.index.get_indexer(table.index)
+        return tables
+
+    def _get_locked(self, engine, key, force_reload=False):
+        cached = self._tables.get(key)
+        if force_reload or cached is None or time.monotonic() - cached[0] >= self.ttl_seconds:
+            cached = self._tables[key] = (time.monotonic(), self._load(engine))
+            self._orphans.pop(key, None)
+        return cached[1]
+
+    def get(self, engine, force_reload=False):
+        with self._lock:
+            return self._get_locked(engine, str(engine.url), force_reload)
+
+    def get_for(self, engine, facts):
+        key = str(engine.url)
+        with self._lock:
+            dimensions = self._get_locked(engine, key)
+            orphans = self._orphans.get(key, set())
+            if not _unknown_keys(facts, dimensions) - orphans:
+                return dimensions
+            dimensions = self._get_locked(engine, key, force_reload=True)
+            # Still missing after a fresh load: orphans, dropped by decode_template_facts
+            still_missing = {(name, k) for name, k in orphans if k not in dimensions[name].index}
+            self._orphans[key] = still_missing | _unknown_keys(facts, dimensions)
+            return dimensions
+
+    def invalidate(self, engine=None):
+        with self._lock:
+            if engine is None:
+                self._tables.clear()
+                self._orphans.clear()
+            else:
+                self._tables.pop(str(engine.url), None)
+                self._orphans.pop(str(engine.url), None)
+
+
+DIMENSIONS = DimensionCache()
+
+
+# --- Template Schedule Fact Query (integer keys only) ---
+def build_template_fact_query(engine):
+    return f"""
     SELECT 
-        e.category,
+        c.category_id,
+        c.appt_template_id,
+        r.resource_id,
         r.week_start_date, 
         r.week_end_date,
-        c.create_timestamp AS [Date Appt Was Created],
-        e.prevent_appts_ind AS [Prevent Appointments?], 
-        c.duration,
-        t.template,
-        y.description AS [Provider]
+        c.create_timestamp,
+        c.duration
     FROM 
         template_members c
     INNER JOIN 
-        appt_templates t ON t.appt_template_id = c.appt_template_id
-    INNER JOIN 
-        categories e ON e.category_id = c.category_id
-    INNER JOIN 
-        resource_templates r ON r.appt_template_id = t.appt_template_id
-    INNER JOIN 
-        resources y ON y.resource_id = r.resource_id
+        resource_templates r ON r.appt_template_id = c.appt_template_id
     WHERE 
-        CONVERT(VARCHAR, r.week_start_date, 112) BETWEEN '{lower_str_sql}' AND '{upper_str_sql}'
+        {week_start_sql(engine)} BETWEEN :lower_date AND :upper_date
     ORDER BY 
         r.week_start_date DESC;
     """
 
-    run_query_and_export(sql_query, output_file, "Template Schedule")
+
+def _unknown_keys(facts, dimensions):
+    unknown = set()
+    for name, table in dimensions.items():
+        keys = facts[DIMENSION_KEYS[name]].dropna()
+        unknown.update((name, k) for k in keys[~keys.isin(table.index)].unique())
+    return unknown
+
+
+# --- Decode keys into the "Template Schedule" layout using categoricals ---
+def decode_template_facts(facts, dimensions):
+    codes = {
+        name: table.index.get_indexer(facts[DIMENSION_KEYS[name]])
+        for name, table in dimensions.items()
+    }
+    # Same rows the server-side INNER JOINs would have kept
+    keep = (codes["categories"] >= 0) & (codes["appt_templates"] >= 0) & (codes["resources"] >= 0)
+    facts = facts[keep].reset_index(drop=True)
+    codes = {name: code[keep] for name, code in codes.items()}
+
+    def categorical(table, column, code):
+        labels, uniques = pd.factorize(table[column])
+        return pd.Categorical.from_codes(labels[code], categories=uniques)
+
+    categories = dimensions["categories"]
+    return pd.DataFrame({
+        "category": categorical(categories, "category", codes["categories"]),
+        "week_start_date": facts["week_start_date"],
+        "week_end_date": facts["week_end_date"],
+        "Date Appt Was Created": facts["create_timestamp"],
+        "Prevent Appointments?": categorical(categories, "prevent_appts_ind", codes["categories"]),
+        "duration": facts["duration"],
+        "template": categorical(dimensions["appt_templates"], "template", codes["appt_templates"]),
+        "Provider": categorical(dimensions["resources"], "description", codes["resources"]),
+    })
+
+
+# --- Template Schedule Fetch (dates as YYYYMMDD strings, upper already adjusted) ---
+def fetch_template_data(engine, lower_str_sql, upper_str_sql, dimension_cache=DIMENSIONS):
+    facts = pd.read_sql(
+        text(build_template_fact_query(engine)),
+        engine,
+        params={"lower_date": lower_str_sql, "upper_date": upper_str_sql},
+    )
+    dimensions = dimension_cache.get_for(engine, facts)
+    return decode_template_facts(facts, dimensions)
+
+
+# --- Main Template Query ---
+def run_main_template_query():
+    lower_date = prompt_date("Enter the LOWER limit date")
+    upper_date = prompt_date("Enter the date of the last SUNDAY that passed (Upper limit)")
+    upper_date_adj = upper_date - timedelta(days=1)
+
+    lower_str_sql = lower_date.strftime("%Y%m%d")
+    upper_str_sql = upper_date_adj.strftime("%Y%m%d")
+    file_date_range = f"{lower_date.strftime('%Y-%m-%d')} to {upper_date.strftime('%Y-%m-%d')}"
+    output_file = fr'C:\Reports\Provider Prod Data Pulls\Prov Prod Data {file_date_range}.xlsx'
+
+    try:
+        engine = get_engine()
+        print("[...] Running SQL Query...")
+        df = fetch_template_data(engine, lower_str_sql, upper_str_sql)
+
+        if df.empty:
+            print("⚠️ No results found for the selected date range.")
+        else:
+            export_to_excel(df, output_file, "Template Schedule")
+    except Exception as e:
+        print(f"[!] ERROR: {e}")
@@ -4,22 +4,11 @@ import subprocess
 from datetime import datetime, timedelta
 import os
 import pandas as pd
-from sqlalchemy import create_engine
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.table import Table, TableStyleInfo
-
-# --- SQL Config ---
-DB_SERVER = 'SBNC-sql'
-DB_NAME = 'NGProd'
-ODBC_DRIVER = 'ODBC Driver 17 for SQL Server'
-
-def get_engine():
-    conn_str = (
-        f"mssql+pyodbc://@{DB_SERVER}/{DB_NAME}"
-        f"?driver={ODBC_DRIVER.replace(' ', '+')}&Trusted_Connection=yes"
-    )
-    return create_engine(conn_str)
+from Core_SQL_Connection_and_Query import fetch_template_data, get_engine
+from Report_Service import SERVICE_URL, fetch_report
 
 def export_to_excel(df, output_path, sheet_name="Results"):
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -53,35 +42,13 @@ def run_main_template_query(lower_date_str, upper_date_str):
     file_date_range = f"{lower_date.strftime('%Y-%m-%d')} to {upper_date.strftime('%Y-%m-%d')}"
     output_file = fr'C:\Reports\Provider Prod Data Pulls\Prov Prod Data {file_date_range}.xlsx'
 
-    sql_query = f"""
-    SELECT 
-        e.category,
-        r.week_start_date, 
-        r.week_end_date,
-        c.create_timestamp AS [Date Appt Was Created],
-        e.prevent_appts_ind AS [Prevent Appointments?], 
-        c.duration,
-        t.template,
-        y.description AS [Provider]
-    FROM 
-        template_members c
-    INNER JOIN 
-        appt_templates t ON t.appt_template_id = c.appt_template_id
-    INNER JOIN 
-        categories e ON e.category_id = c.category_id
-    INNER JOIN 
-        resource_templates r ON r.appt_template_id = t.appt_template_id
-    INNER JOIN 
-        resources y ON y.resource_id = r.resource_id
-    WHERE 
-        CONVERT(VARCHAR, r.week_start_date, 112) BETWEEN '{lower_str_sql}' AND '{upper_str_sql}'
-    ORDER BY 
-        r.week_start_date DESC;
-    """
-
     try:
-        engine = get_engine()
-        df = pd.read_sql(sql_query, engine)
+        if SERVICE_URL:
+            # Shared report service owns the SQL connection and result cache
+            df = fetch_report("templates", lower_date_str, upper_date_str, base_url=SERVICE_URL)
+        else:
+            engine = get_engine()
+            df = fetch_template_data(engine, lower_str_sql, upper_str_sql)
         if df.empty:
             append_output("⚠️ No results found.")
         else:
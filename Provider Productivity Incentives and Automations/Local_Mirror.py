@@ -0,0 +1,315 @@
+import argparse
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import bindparam, create_engine, text
+
+from Core_SQL_Connection_and_Query import export_to_excel, get_engine, fetch_template_data
+from Report_Aggregates import EXEMPT_EXCLUDED_CATEGORIES, INPUT_DIR, parse_ymd
+
+# --- Mirror Configuration ---
+MIRROR_PATH = os.environ.get("PROV_PROD_MIRROR_PATH", os.path.join(INPUT_DIR, "prov_prod_mirror.sqlite"))
+
+MIRROR_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS template_schedule (
+        provider TEXT NOT NULL,
+        category TEXT,
+        template TEXT,
+        prevent_appts_ind TEXT,
+        week_start_date TEXT NOT NULL,
+        week_end_date TEXT,
+        iso_week TEXT NOT NULL,
+        create_timestamp TEXT,
+        duration REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_template_provider_week ON template_schedule (provider, iso_week)",
+    "CREATE INDEX IF NOT EXISTS ix_template_week_start ON template_schedule (week_start_date)",
+    """
+    CREATE TABLE IF NOT EXISTS kept_appointments (
+        provider TEXT NOT NULL,
+        appt_date TEXT NOT NULL,
+        iso_week TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_appt_provider_week ON kept_appointments (provider, iso_week)",
+    "CREATE INDEX IF NOT EXISTS ix_appt_date ON kept_appointments (appt_date)",
+    """
+    CREATE TABLE IF NOT EXISTS provider_specialty (
+        provider TEXT PRIMARY KEY,
+        specialty TEXT,
+        productivity_target REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sync_log (
+        table_name TEXT NOT NULL,
+        lower_date TEXT,
+        upper_date TEXT,
+        row_count INTEGER,
+        synced_at TEXT NOT NULL
+    )
+    """,
+]
+
+# Same rules as Report_Aggregates.summarise_productivity and the R scripts:
+# - non-exempt = prevent 'N' or Charting Time; exempt = prevent 'Y' outside the excluded categories
+# - hours are NULL (R's NA), not 0, for a provider-week with no rows of that kind
+# - week dates come from the non-exempt rows, as in the R summaries
+# - provider-weeks with kept appointments but no schedule are kept (R's full_join)
+_EXCLUDED = ", ".join(f"'{c}'" for c in EXEMPT_EXCLUDED_CATEGORIES)
+_NON_EXEMPT = "(prevent_appts_ind = 'N' OR category = 'Charting Time')"
+_EXEMPT = f"(prevent_appts_ind = 'Y' AND category NOT IN ({_EXCLUDED}))"
+WEEKLY_SUMMARY_SQL = f"""
+    WITH sched AS (
+        SELECT
+            provider,
+            iso_week,
+            MIN(CASE WHEN {_NON_EXEMPT} THEN week_start_date END) AS week_start_date,
+            MAX(CASE WHEN {_NON_EXEMPT} THEN week_end_date END) AS week_end_date,
+            ROUND(SUM(CASE WHEN {_NON_EXEMPT} THEN duration END) / 60.0, 2) AS non_exempt_hours,
+            ROUND(SUM(CASE WHEN {_EXEMPT} THEN duration END) / 60.0, 2) AS exempt_hours
+        FROM template_schedule
+        WHERE week_start_date BETWEEN :start_date AND :end_date
+          AND (:provider IS NULL OR provider = :provider)
+        GROUP BY provider, iso_week
+    ),
+    kept AS (
+        SELECT provider, iso_week, COUNT(*) AS kept_appts
+        FROM kept_appointments
+        WHERE appt_date BETWEEN :start_date AND date(:end_date, '+6 days')
+          AND (:provider IS NULL OR provider = :provider)
+        GROUP BY provider, iso_week
+    ),
+    provider_weeks AS (
+        SELECT provider, iso_week FROM sched
+        UNION
+        SELECT provider, iso_week FROM kept
+    )
+    SELECT
+        w.provider AS [Provider],
+        p.specialty AS [Provider Specialty],
+        w.iso_week AS [ISO Week],
+        s.week_start_date,
+        s.week_end_date,
+        s.non_exempt_hours AS [Total Non-Exempt Hours On Schedule],
+        s.exempt_hours AS [Total Exempt Hours on Schedule],
+        k.kept_appts AS [Total Number of Kept Appointments],
+        ROUND(k.kept_appts / NULLIF(s.non_exempt_hours, 0), 4) AS [Total Productivity],
+        p.productivity_target AS [Productivity Target?]
+    FROM provider_weeks w
+    LEFT JOIN sched s ON s.provider = w.provider AND s.iso_week = w.iso_week
+    LEFT JOIN kept k ON k.provider = w.provider AND k.iso_week = w.iso_week
+    LEFT JOIN provider_specialty p ON p.provider = w.provider
+    WHERE (:specialty IS NULL OR p.specialty = :specialty)
+    ORDER BY w.provider, w.iso_week
+"""
+
+
+def iso_week_label(dates):
+    iso = dates.dt.isocalendar()
+    label = iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+    return label.where(dates.notna())
+
+
+# Keep missing values as NULL instead of the text "nan" / "NaT"
+def text_or_null(series):
+    return series.astype(str).where(series.notna())
+
+
+# --- Local Mirror ---
+class LocalMirror:
+    def __init__(self, path=MIRROR_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.engine = create_engine(f"sqlite:///{path}")
+        with self.engine.begin() as conn:
+            for statement in MIRROR_SCHEMA:
+                conn.execute(text(statement))
+
+    def _log_sync(self, conn, table_name, lower_date, upper_date, row_count):
+        conn.execute(
+            text("INSERT INTO sync_log VALUES (:t, :lower, :upper, :n, :at)"),
+            {"t": table_name, "lower": lower_date, "upper": upper_date, "n": row_count,
+             "at": datetime.now().isoformat(timespec="seconds")},
+        )
+
+    # --- Sync template history (replaces whatever the mirror held for those weeks) ---
+    def sync_templates(self, lower_date, upper_date, source_engine=None):
+        lower_date = pd.Timestamp(lower_date).strftime("%Y-%m-%d")
+        upper_date = pd.Timestamp(upper_date).strftime("%Y-%m-%d")
+        df = fetch_template_data(
+            source_engine or get_engine(), lower_date.replace("-", ""), upper_date.replace("-", "")
+        )
+        week_start = parse_ymd(df["week_start_date"])
+        week_end = parse_ymd(df["week_end_date"])
+        rows = pd.DataFrame({
+            "provider": text_or_null(df["Provider"]),
+            "category": text_or_null(df["category"]),
+            "template": text_or_null(df["template"]),
+            "prevent_appts_ind": text_or_null(df["Prevent Appointments?"]).str.upper(),
+            "week_start_date": week_start.dt.strftime("%Y-%m-%d"),
+            "week_end_date": week_end.dt.strftime("%Y-%m-%d"),
+            "iso_week": iso_week_label(week_end),
+            "create_timestamp": text_or_null(df["Date Appt Was Created"]),
+            "duration": df["duration"],
+        }).dropna(subset=["provider", "week_start_date", "iso_week"])
+
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM template_schedule WHERE week_start_date BETWEEN :lower AND :upper"),
+                {"lower": lower_date, "upper": upper_date},
+            )
+            rows.to_sql("template_schedule", conn, if_exists="append", index=False, chunksize=5000)
+            self._log_sync(conn, "template_schedule", lower_date, upper_date, len(rows))
+        print(f"[✓] Mirrored {len(rows)} template rows for {lower_date} to {upper_date}")
+        return len(rows)
+
+    # --- Load a Kept Appointments export ('Res Name', 'Appt Dt') ---
+    def load_appointments(self, appt_file):
+        appt = pd.read_excel(appt_file)
+        appt_date = parse_ymd(appt["Appt Dt"])
+        rows = pd.DataFrame({
+            "provider": text_or_null(appt["Res Name"]),
+            "appt_date": appt_date.dt.strftime("%Y-%m-%d"),
+            "iso_week": iso_week_label(appt_date),
+        }).dropna(subset=["provider", "appt_date"])
+        if rows.empty:
+            print("⚠️ No appointments found in the file.")
+            return 0
+
+        # Only replace the providers in this export, so a clinic- or provider-filtered
+        # file does not wipe everyone else's appointments for the same dates
+        lower_date, upper_date = rows["appt_date"].min(), rows["appt_date"].max()
+        delete_sql = text(
+            "DELETE FROM kept_appointments "
+            "WHERE appt_date BETWEEN :lower AND :upper AND provider IN :providers"
+        ).bindparams(bindparam("providers", expanding=True))
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete_sql,
+                {"lower": lower_date, "upper": upper_date, "providers": sorted(rows["provider"].unique())},
+            )
+            rows.to_sql("kept_appointments", conn, if_exists="append", index=False, chunksize=5000)
+            self._log_sync(conn, "kept_appointments", lower_date, upper_date, len(rows))
+        print(f"[✓] Mirrored {len(rows)} kept appointments for {lower_date} to {upper_date}")
+        return len(rows)
+
+    # --- Load the Provider Specialty / Productivity Target file ---
+    def load_specialties(self, specialty_file):
+        spec = pd.read_excel(specialty_file)
+        rows = pd.DataFrame({
+            "provider": text_or_null(spec["Provider"]),
+            "specialty": spec["Provider Specialty"],
+            "productivity_target": pd.to_numeric(spec["Productivity Target?"], errors="coerce"),
+        }).dropna(subset=["provider"]).drop_duplicates("provider", keep="last")
+
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM provider_specialty"))
+            rows.to_sql("provider_specialty", conn, if_exists="append", index=False)
+            self._log_sync(conn, "provider_specialty", None, None, len(rows))
+        print(f"[✓] Mirrored {len(rows)} provider specialties")
+        return len(rows)
+
+    # --- Query API ---
+    def query(self, sql, params=None):
+        return pd.read_sql(text(sql), self.engine, params=params or {})
+
+    def weekly_summary(self, start_date, end_date=None, provider=None, specialty=None):
+        end_date = end_date or date.today()
+        return self.query(WEEKLY_SUMMARY_SQL, {
+            "start_date": pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+            "end_date": pd.Timestamp(end_date).strftime("%Y-%m-%d"),
+            "provider": provider,
+            "specialty": specialty,
+        })
+
+    # Last N weeks whose start falls in (end - N weeks, end]. By default only weeks
+    # already finished by as_of count (week_start + 6 days < as_of), so the
+    # in-progress week is left out; include_current=True counts it.
+    def trailing_weeks(self, weeks=13, provider=None, specialty=None, as_of=None, include_current=False):
+        end_date = pd.Timestamp(as_of or date.today())
+        if not include_current:
+            end_date -= timedelta(days=7)
+        start_date = end_date - timedelta(weeks=weeks) + timedelta(days=1)
+        return self.weekly_summary(start_date, end_date, provider, specialty)
+
+    def sync_history(self):
+        return self.query("SELECT * FROM sync_log ORDER BY synced_at DESC")
+
+
+# --- CLI ---
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local provider productivity mirror")
+    parser.add_argument("--mirror", default=MIRROR_PATH, help="Path to the mirror database file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sync = sub.add_parser("sync", help="Pull template history from NGProd into the mirror")
+    sync.add_argument("--lower", required=True, help="First week start date (YYYY-MM-DD)")
+    sync.add_argument("--upper", required=True, help="Last week start date (YYYY-MM-DD)")
+
+    appts = sub.add_parser("load-appts", help="Load a Kept Appointments Excel export")
+    appts.add_argument("file")
+
+    specs = sub.add_parser("load-specialties", help="Load the Provider Specialty Excel file")
+    specs.add_argument("file")
+
+    summary = sub.add_parser("summary", help="Weekly hours and productivity by provider")
+    summary.add_argument("--start", help="Start date (YYYY-MM-DD)")
+    summary.add_argument("--end", help="End date (YYYY-MM-DD, default today)")
+    summary.add_argument("--trailing", type=int, help="Trailing N completed weeks instead of --start")
+    summary.add_argument("--include-current", action="store_true", help="Count the in-progress week with --trailing")
+    summary.add_argument("--provider")
+    summary.add_argument("--specialty")
+    summary.add_argument("--output", help="Write to .csv or .xlsx instead of printing")
+
+    sql = sub.add_parser("sql", help="Run an ad-hoc SQL query against the mirror")
+    sql.add_argument("statement")
+    sql.add_argument("--output", help="Write to .csv or .xlsx instead of printing")
+
+    sub.add_parser("status", help="Show what has been synced into the mirror")
+    return parser
+
+
+def write_or_print(df, output=None):
+    if not output:
+        with pd.option_context("display.max_rows", 200, "display.width", 200):
+            print(df.to_string(index=False))
+    elif output.lower().endswith(".xlsx"):
+        export_to_excel(df, os.path.abspath(output), "Results")
+    else:
+        df.to_csv(output, index=False)
+        print(f"[✓] CSV exported to: {output}")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    mirror = LocalMirror(args.mirror)
+
+    if args.command == "sync":
+        mirror.sync_templates(args.lower, args.upper)
+    elif args.command == "load-appts":
+        mirror.load_appointments(args.file)
+    elif args.command == "load-specialties":
+        mirror.load_specialties(args.file)
+    elif args.command == "summary":
+        if args.trailing:
+            df = mirror.trailing_weeks(
+                args.trailing, args.provider, args.specialty, args.end, args.include_current
+            )
+        elif args.start:
+            df = mirror.weekly_summary(args.start, args.end, args.provider, args.specialty)
+        else:
+            print("❌ Provide --start or --trailing.")
+            return
+        write_or_print(df, args.output)
+    elif args.command == "sql":
+        write_or_print(mirror.query(args.statement), args.output)
+    elif args.command == "status":
+        write_or_print(mirror.sync_history())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from Core_SQL_Connection_and_Query import run_main_template_query
+from Core_SQL_Connection_and_Query import run_main_template_query, prompt_date
+from Local_Mirror import LocalMirror
+from Report_Service import serve
 from R_Script_Subprocesses import R_ScriptRunIncentive, R_Script_4Week, RScript_ISoWeek, RSCRIPT_ISoweek_By_Provider
 
 if __name__ == "__main__":
@@ -9,8 +11,10 @@ if __name__ == "__main__":
           "1.) File with 'Kept' in the name is saved\n"
           "2.) File with 'Specialty' is saved\n"
           "3.) File from Option 1 is saved successfully")
+    print("3 = Start Local Report Service (shared cache for the GUI and other analysts)")
+    print("4 = Update Local Analytics Mirror (ad-hoc queries: python Local_Mirror.py summary --help)")
 
-    choice = input("Enter 1 or 2: ").strip()
+    choice = input("Enter 1, 2, 3, or 4: ").strip()
 
     if choice == "1":
         run_main_template_query()
@@ -39,5 +43,16 @@ if __name__ == "__main__":
             else:
                 print("❌ Invalid selection. Try again.")
 
+    elif choice == "3":
+        serve()
+
+    elif choice == "4":
+        lower_date = prompt_date("Enter the FIRST week start date to mirror")
+        upper_date = prompt_date("Enter the LAST week start date to mirror")
+        try:
+            LocalMirror().sync_templates(lower_date, upper_date)
+        except Exception as e:
+            print(f"[!] ERROR: {e}")
+
     else:
         print("❌ Invalid selection. Exiting.")
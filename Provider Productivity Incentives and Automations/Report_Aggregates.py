@@ -0,0 +1,142 @@
+import os
+import re
+import pandas as pd
+
+# --- Configuration ---
+INPUT_DIR = r"C:/Reports/Provider Prod Data Pulls"
+APPT_FILE_PATTERN = re.compile(r"Kept|Appt|appointments|NG", re.IGNORECASE)
+APPT_FILE_EXCLUDE = re.compile(r"PROD|Productivity", re.IGNORECASE)
+SPECIALTY_FILE_PATTERN = re.compile(r"Provider_Productivity_Weeks|special|specialties", re.IGNORECASE)
+
+EXEMPT_EXCLUDED_CATEGORIES = ["Charting Time", "Administrative Time"]
+WEEK_KEYS = ["Provider", "ISO Year", "ISoweek_start_date"]
+INCENTIVE_PER_ENCOUNTER = 10
+
+
+# --- Input File Detection (same rules as the R scripts) ---
+def find_input_file(pattern, exclude=None, input_dir=INPUT_DIR):
+    if not os.path.isdir(input_dir):
+        return None
+    for name in sorted(os.listdir(input_dir)):
+        if not name.lower().endswith(".xlsx"):
+            continue
+        if pattern.search(name) and not (exclude and exclude.search(name)):
+            return os.path.join(input_dir, name)
+    return None
+
+
+# --- Date Parsing (accepts YYYYMMDD, YYYY-MM-DD and datetimes, like lubridate::ymd) ---
+def parse_ymd(series):
+    digits = series.astype(str).str[:10].str.replace("-", "", regex=False)
+    return pd.to_datetime(digits, format="%Y%m%d", errors="coerce")
+
+
+def add_iso_week(df, date_col):
+    iso = parse_ymd(df[date_col]).dt.isocalendar()
+    df = df.copy()
+    df["ISO Year"] = iso["year"]
+    df["ISoweek_start_date"] = iso["week"]
+    return df
+
+
+# --- Exempt / Non-Exempt Hours by Provider and ISO Week ---
+def summarise_hours(template_df):
+    prod = add_iso_week(template_df, "week_end_date")
+    prod["week_start_date"] = parse_ymd(prod["week_start_date"])
+    prod["week_end_date"] = parse_ymd(prod["week_end_date"])
+    # An empty SQL result comes back with object dtype, which the hour rounding rejects
+    prod["duration"] = pd.to_numeric(prod["duration"]).astype("float64")
+
+    prevent = prod["Prevent Appointments?"].astype(str).str.upper()
+    charting = prod["category"] == "Charting Time"
+    non_exempt = prod[(prevent == "N") | charting]
+    exempt = prod[(prevent == "Y") & ~prod["category"].isin(EXEMPT_EXCLUDED_CATEGORIES)]
+
+    non_exempt_summary = non_exempt.groupby(WEEK_KEYS, as_index=False, observed=True).agg(
+        **{
+            "Total Non Exemption Time (Mins)": ("duration", "sum"),
+            "week_start_date": ("week_start_date", "min"),
+            "week_end_date": ("week_end_date", "max"),
+        }
+    )
+    non_exempt_summary["Total Non-Exempt Hours On Schedule"] = (
+        non_exempt_summary["Total Non Exemption Time (Mins)"] / 60
+    ).round(2)
+
+    exempt_summary = exempt.groupby(WEEK_KEYS, as_index=False, observed=True).agg(
+        **{"Total Exemption Time": ("duration", "sum")}
+    )
+    exempt_summary["Total Exempt Hours on Schedule"] = (exempt_summary["Total Exemption Time"] / 60).round(2)
+
+    return non_exempt_summary.merge(exempt_summary, on=WEEK_KEYS, how="outer").sort_values(WEEK_KEYS)
+
+
+# --- Kept Appointments by Provider and ISO Week ---
+def summarise_kept_appointments(appt_df):
+    appt = add_iso_week(appt_df.rename(columns={"Res Name": "Provider"}), "Appt Dt")
+    return appt.groupby(WEEK_KEYS, as_index=False, observed=True).size().rename(
+        columns={"size": "Total Number of Kept Appointments"}
+    )
+
+
+# --- Provider / Week Productivity ---
+def summarise_productivity(template_df, appt_df):
+    hours = summarise_hours(template_df)
+    kept = summarise_kept_appointments(appt_df)
+    final = hours.merge(kept, on=WEEK_KEYS, how="outer")
+
+    non_exempt_hours = final["Total Non-Exempt Hours On Schedule"]
+    final["Total Productivity"] = (
+        final["Total Number of Kept Appointments"] / non_exempt_hours.where(non_exempt_hours != 0)
+    ).round(4)
+    return final.sort_values(WEEK_KEYS).reset_index(drop=True)
+
+
+# --- Two-Week Incentive Payment Calculation ---
+def calculate_incentives(productivity_df, specialty_df, pay_period_start, target_override=None):
+    pay_period_start = pd.Timestamp(pay_period_start)
+    final = productivity_df.dropna(subset=["week_start_date"]).copy()
+    final["Two_Week_Group"] = ((final["week_start_date"] - pay_period_start).dt.days // 14) + 1
+    final = final[final["Two_Week_Group"] != 0]
+
+    summary = final.groupby(["Provider", "Two_Week_Group"], as_index=False, observed=True).agg(
+        **{
+            "Total Kept Appointments": ("Total Number of Kept Appointments", "sum"),
+            "Total Non-Exempt Hours On Schedule": ("Total Non-Exempt Hours On Schedule", "sum"),
+            "Total Exempt Hours on Schedule": ("Total Exempt Hours on Schedule", "sum"),
+        }
+    )
+
+    mapping = final.groupby("Two_Week_Group", as_index=False).agg(
+        Min_Date=("week_start_date", "min"), Max_Date=("week_end_date", "max")
+    )
+    mapping["Two_Week_Label"] = (
+        "Period " + mapping["Two_Week_Group"].astype(str) + ": "
+        + mapping["Min_Date"].dt.strftime("%Y-%m-%d") + " to "
+        + (mapping["Max_Date"] + pd.Timedelta(days=1)).dt.strftime("%Y-%m-%d")
+    )
+
+    specialty = specialty_df[["Provider", "Provider Specialty", "Productivity Target?"]].copy()
+    specialty["Productivity Target?"] = pd.to_numeric(specialty["Productivity Target?"], errors="coerce")
+    if target_override is not None:
+        # Mirrors the R "2.0 Productivity Target" workbook: 2.2 targets are recoded
+        specialty.loc[specialty["Productivity Target?"] == 2.2, "Productivity Target?"] = target_override
+
+    incentive = summary.merge(mapping, on="Two_Week_Group", how="left").merge(specialty, on="Provider", how="left")
+    incentive["Encounters Needed To Hit Goal at Prod Target"] = (
+        incentive["Total Non-Exempt Hours On Schedule"] * incentive["Productivity Target?"]
+    )
+    incentive["Total Encounters Rendered Vs Goal"] = (
+        incentive["Total Kept Appointments"] - incentive["Encounters Needed To Hit Goal at Prod Target"]
+    ).round(0)
+    incentive["Incentive Payment"] = (
+        incentive["Total Encounters Rendered Vs Goal"].clip(lower=0) * INCENTIVE_PER_ENCOUNTER
+    )
+
+    return incentive.sort_values(["Two_Week_Group", "Provider"])[
+        [
+            "Provider", "Two_Week_Label", "Total Non-Exempt Hours On Schedule", "Productivity Target?",
+            "Encounters Needed To Hit Goal at Prod Target", "Total Kept Appointments",
+            "Total Encounters Rendered Vs Goal", "Incentive Payment",
+        ]
+    ].drop_duplicates(["Provider", "Two_Week_Label"]).reset_index(drop=True)
@@ -0,0 +1,317 @@
+import importlib.util
+import io
+import json
+import os
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from Core_SQL_Connection_and_Query import get_engine, fetch_template_data
+from Report_Aggregates import (
+    APPT_FILE_EXCLUDE, APPT_FILE_PATTERN, INPUT_DIR, SPECIALTY_FILE_PATTERN,
+    calculate_incentives, find_input_file, parse_ymd, summarise_hours, summarise_productivity,
+)
+
+# --- Service Configuration ---
+SERVICE_HOST = os.environ.get("PROV_PROD_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("PROV_PROD_SERVICE_PORT", "8765"))
+SERVICE_URL = os.environ.get("PROV_PROD_SERVICE_URL")
+CACHE_TTL_SECONDS = int(os.environ.get("PROV_PROD_CACHE_TTL", "900"))
+CACHE_MAX_ENTRIES = int(os.environ.get("PROV_PROD_CACHE_MAX_ENTRIES", "64"))
+
+REPORTS = ("templates", "hours", "productivity", "incentive")
+CONTENT_TYPES = {
+    "json": "application/json",
+    # JSON Table Schema: carries dtypes (categoricals, dates) for the Python client
+    "table": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ReportRequestError(ValueError):
+    pass
+
+
+# --- Shared Result Cache (TTL + LRU bound + coalescing of concurrent identical requests) ---
+class ReportCache:
+    def __init__(self, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._in_flight = {}
+
+    def _prune(self, now):
+        # Caller holds the lock
+        for key in [k for k, (stored_at, _) in self._results.items() if now - stored_at >= self.ttl_seconds]:
+            del self._results[key]
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl_seconds:
+                self._results.move_to_end(key)
+                return cached[1]
+            pending = self._in_flight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._in_flight[key] = {"done": threading.Event(), "result": None, "error": None}
+
+        if not owner:
+            pending["done"].wait()
+            if pending["error"] is not None:
+                raise pending["error"]
+            return pending["result"]
+
+        try:
+            pending["result"] = compute()
+            with self._lock:
+                now = time.monotonic()
+                self._results[key] = (now, pending["result"])
+                self._results.move_to_end(key)
+                self._prune(now)
+            return pending["result"]
+        except Exception as e:
+            pending["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            pending["done"].set()
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [k for k in self._results if predicate(k)]:
+                del self._results[key]
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
+
+
+# --- Kept appointments falling in the weeks whose start is within the range ---
+def appointments_in_range(appt_df, lower_str_sql, upper_str_sql):
+    appt_date = parse_ymd(appt_df["Appt Dt"])
+    last_day = pd.Timestamp(upper_str_sql) + timedelta(days=6)
+    return appt_df[(appt_date >= pd.Timestamp(lower_str_sql)) & (appt_date <= last_day)]
+
+
+# --- Report Engine (owns the SQL engine and the cache) ---
+class ReportService:
+    def __init__(self, engine=None, input_dir=INPUT_DIR, cache=None):
+        self.engine = engine or get_engine()
+        self.input_dir = input_dir
+        self.cache = cache or ReportCache()
+
+    def _excel(self, pattern, exclude=None, label="Input"):
+        path = find_input_file(pattern, exclude, self.input_dir)
+        if path is None:
+            raise ReportRequestError(f"{label} file not found in {self.input_dir}")
+        stamp = (path, os.path.getmtime(path))
+        # A replaced file gets a new mtime; drop the copies read from older versions
+        self.cache.discard_where(lambda k: k[:2] == ("excel", path) and k[2] != stamp[1])
+        return stamp, self.cache.get_or_compute(("excel",) + stamp, lambda: pd.read_excel(path))
+
+    def templates(self, lower_str_sql, upper_str_sql):
+        key = ("templates", lower_str_sql, upper_str_sql)
+        return self.cache.get_or_compute(
+            key, lambda: fetch_template_data(self.engine, lower_str_sql, upper_str_sql)
+        )
+
+    def hours(self, lower_str_sql, upper_str_sql):
+        key = ("hours", lower_str_sql, upper_str_sql)
+        return self.cache.get_or_compute(
+            key, lambda: summarise_hours(self.templates(lower_str_sql, upper_str_sql))
+        )
+
+    def productivity(self, lower_str_sql, upper_str_sql):
+        appt_stamp, appt_df = self._excel(APPT_FILE_PATTERN, APPT_FILE_EXCLUDE, "Appointment")
+        key = ("productivity", lower_str_sql, upper_str_sql, appt_stamp)
+        return self.cache.get_or_compute(
+            key,
+            lambda: summarise_productivity(
+                self.templates(lower_str_sql, upper_str_sql),
+                appointments_in_range(appt_df, lower_str_sql, upper_str_sql),
+            ),
+        )
+
+    def incentive(self, lower_str_sql, upper_str_sql, pay_period_start, target_override=None):
+        specialty_stamp, specialty_df = self._excel(SPECIALTY_FILE_PATTERN, label="Specialty")
+        appt_stamp, _ = self._excel(APPT_FILE_PATTERN, APPT_FILE_EXCLUDE, "Appointment")
+        key = ("incentive", lower_str_sql, upper_str_sql, appt_stamp, specialty_stamp, pay_period_start, target_override)
+        return self.cache.get_or_compute(
+            key,
+            lambda: calculate_incentives(
+                self.productivity(lower_str_sql, upper_str_sql), specialty_df, pay_period_start, target_override
+            ),
+        )
+
+    # --- Dispatch from query string parameters ---
+    def run_report(self, report, params):
+        if report not in REPORTS:
+            raise ReportRequestError(f"Unknown report '{report}'. Choose one of: {', '.join(REPORTS)}")
+        try:
+            lower_date = datetime.strptime(params["lower"], "%Y-%m-%d")
+            upper_date = datetime.strptime(params["upper"], "%Y-%m-%d")
+        except KeyError:
+            raise ReportRequestError("Both 'lower' and 'upper' dates are required (YYYY-MM-DD).")
+        except ValueError:
+            raise ReportRequestError("Dates must be in YYYY-MM-DD format.")
+
+        # Same convention as the file pull: upper is the last Sunday, query stops the day before
+        lower_str_sql = lower_date.strftime("%Y%m%d")
+        upper_str_sql = (upper_date - timedelta(days=1)).strftime("%Y%m%d")
+
+        if report != "incentive":
+            return getattr(self, report)(lower_str_sql, upper_str_sql)
+
+        try:
+            pay_period = datetime.strptime(params["pay_period"], "%Y-%m-%d").strftime("%Y-%m-%d")
+            target = float(params["target"]) if params.get("target") else None
+        except KeyError:
+            raise ReportRequestError("'pay_period' (YYYY-MM-DD) is required for the incentive report.")
+        except ValueError:
+            raise ReportRequestError("'pay_period' must be YYYY-MM-DD and 'target' must be numeric.")
+        return self.incentive(lower_str_sql, upper_str_sql, pay_period, target)
+
+
+# --- Serialisation ---
+def serialise(df, fmt):
+    if fmt == "json":
+        return df.to_json(orient="records", date_format="iso").encode("utf-8")
+    if fmt == "table":
+        return df.to_json(orient="table", index=False, date_format="iso").encode("utf-8")
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "parquet":
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    raise ReportRequestError(f"Unknown format '{fmt}'. Choose one of: {', '.join(CONTENT_TYPES)}")
+
+
+# --- HTTP Handler ---
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body, content_type="application/json", filename=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error_json(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        report = url.path.strip("/")
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+
+        if report == "health":
+            self._send(200, json.dumps({"status": "ok", "reports": list(REPORTS)}).encode("utf-8"))
+            return
+
+        fmt = params.get("format", "json").lower()
+        try:
+            if fmt not in CONTENT_TYPES:
+                raise ReportRequestError(f"Unknown format '{fmt}'. Choose one of: {', '.join(CONTENT_TYPES)}")
+            df = self.service.run_report(report, params)
+            body = serialise(df, fmt)
+        except ReportRequestError as e:
+            self._send_error_json(404 if report not in REPORTS else 400, str(e))
+            return
+        except ImportError as e:
+            self._send_error_json(501, f"Format '{fmt}' is unavailable on this server: {e}")
+            return
+        except Exception as e:
+            # Driver/server details stay in the service log, not in the client response
+            print(f"[!] ERROR: {report} {params}: {e}")
+            traceback.print_exc()
+            self._send_error_json(500, "Report failed. See the report service log for details.")
+            return
+
+        filename = f"{report} {params['lower']} to {params['upper']}.{fmt}" if fmt in ("csv", "parquet") else None
+        self._send(200, body, CONTENT_TYPES[fmt], filename)
+
+    def log_message(self, format, *args):
+        print(f"[service] {self.address_string()} - {format % args}")
+
+
+def make_server(service=None, host=SERVICE_HOST, port=SERVICE_PORT):
+    handler = type("BoundReportRequestHandler", (ReportRequestHandler,), {"service": service or ReportService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(host=SERVICE_HOST, port=SERVICE_PORT):
+    server = make_server(host=host, port=port)
+    print(f"[✓] Report service listening on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🔚 Report service stopped.")
+    finally:
+        server.server_close()
+
+
+# --- Client (used by the GUI when PROV_PROD_SERVICE_URL is set) ---
+# Parquet or table-schema JSON keep the dtypes fetch_template_data returns, so the
+# workbook written from the service matches the direct SQL pull (CSV would turn
+# week_start_date into integers and categoricals into plain text).
+def parquet_available():
+    return any(importlib.util.find_spec(name) for name in ("pyarrow", "fastparquet"))
+
+
+class ReportClientError(RuntimeError):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _request(url, timeout):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        message = json.loads(e.read() or b"{}").get("error", str(e))
+        raise ReportClientError(e.code, message) from None
+
+
+def fetch_report(report, lower_date_str, upper_date_str, base_url=None, timeout=600, **extra):
+    base_url = (base_url or SERVICE_URL or f"http://{SERVICE_HOST}:{SERVICE_PORT}").rstrip("/")
+    params = {"lower": lower_date_str, "upper": upper_date_str, **extra}
+
+    if parquet_available():
+        query = urllib.parse.urlencode({**params, "format": "parquet"})
+        try:
+            return pd.read_parquet(io.BytesIO(_request(f"{base_url}/{report}?{query}", timeout)))
+        except ReportClientError as e:
+            if e.status != 501:
+                raise
+            # Service has no Parquet engine; fall through to table-schema JSON
+
+    query = urllib.parse.urlencode({**params, "format": "table"})
+    body = _request(f"{base_url}/{report}?{query}", timeout)
+    return pd.read_json(io.StringIO(body.decode("utf-8")), orient="table")
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+from Core_SQL_Connection_and_Query import get_engine
+
+# --- SQLite stand-in for the NGProd tables used by the template query ---
+STAND_IN_SCHEMA = """
+CREATE TABLE categories (category_id INTEGER, category TEXT, prevent_appts_ind TEXT);
+CREATE TABLE appt_templates (appt_template_id INTEGER, template TEXT);
+CREATE TABLE resources (resource_id INTEGER, description TEXT);
+CREATE TABLE resource_templates (appt_template_id INTEGER, resource_id INTEGER, week_start_date TEXT, week_end_date TEXT);
+CREATE TABLE template_members (appt_template_id INTEGER, category_id INTEGER, duration INTEGER, create_timestamp TEXT);
+
+INSERT INTO categories VALUES
+    (1, 'Office Visit', 'N'), (2, 'Charting Time', 'Y'), (3, 'Vacation', 'Y'), (4, 'Administrative Time', 'Y');
+INSERT INTO appt_templates VALUES (10, 'Dr A Wk1'), (11, 'Dr A Wk2'), (12, 'Dr A Wk3'), (13, 'Dr A Prior'), (20, 'Dr B Wk1');
+INSERT INTO resources VALUES (100, 'Dr A'), (101, 'Dr B');
+INSERT INTO resource_templates VALUES
+    (10, 100, '20250106', '20250112'),
+    (11, 100, '20250113', '20250119'),
+    (12, 100, '20250120', '20250126'),
+    (13, 100, '20241230', '20250105'),
+    (20, 101, '20250106', '20250112'),
+    (20, 999, '20250106', '20250112');
+INSERT INTO template_members VALUES
+    (10, 1, 480, '2024-12-01'), (10, 2, 60, '2024-12-01'), (10, 3, 120, '2024-12-01'), (10, 4, 30, '2024-12-01'),
+    (11, 1, 540, '2024-12-01'),
+    (12, 1, 600, '2024-12-01'),
+    (13, 1, 600, '2024-12-01'),
+    (20, 1, 600, '2024-12-02'), (20, 77, 45, '2024-12-02');
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "stand_in.db"
+    con = sqlite3.connect(path)
+    con.executescript(STAND_IN_SCHEMA)
+    con.close()
+    return get_engine(f"sqlite:///{path}")
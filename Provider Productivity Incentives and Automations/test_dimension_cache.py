@@ -0,0 +1,58 @@
+import threading
+
+from sqlalchemy import text
+
+from Core_SQL_Connection_and_Query import DimensionCache, fetch_template_data
+
+
+def count_loads(monkeypatch):
+    loads = []
+    original = DimensionCache._load
+    monkeypatch.setattr(DimensionCache, "_load", lambda self, e: loads.append(1) or original(self, e))
+    return loads
+
+
+def test_orphan_keys_do_not_reload_dimensions_every_fetch(engine, monkeypatch):
+    loads = count_loads(monkeypatch)
+    cache = DimensionCache()
+
+    # resource 999 and category 77 have no dimension rows: one reload, then treated as orphans
+    for _ in range(5):
+        assert len(fetch_template_data(engine, "20241201", "20250131", cache)) == 8
+    assert len(loads) == 2
+
+
+def test_new_provider_after_first_fetch_is_reloaded_not_dropped(engine):
+    cache = DimensionCache()
+    assert len(fetch_template_data(engine, "20241201", "20250131", cache)) == 8
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO resources VALUES (102, 'Dr C')"))
+        conn.execute(text("INSERT INTO appt_templates VALUES (30, 'Dr C Wk1')"))
+        conn.execute(text("INSERT INTO resource_templates VALUES (30, 102, '20250106', '20250112')"))
+        conn.execute(text("INSERT INTO template_members VALUES (30, 1, 480, '2024-12-03'), (30, 3, 60, '2024-12-03')"))
+
+    df = fetch_template_data(engine, "20241201", "20250131", cache)
+    assert len(df) == 10
+    assert (df["Provider"] == "Dr C").sum() == 2
+
+
+def test_get_for_survives_concurrent_invalidate(engine):
+    cache = DimensionCache()
+    errors = []
+
+    def fetch():
+        try:
+            for _ in range(20):
+                fetch_template_data(engine, "20241201", "20250131", cache)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for _ in range(50):
+        cache.invalidate()
+    for t in threads:
+        t.join()
+    assert errors == []
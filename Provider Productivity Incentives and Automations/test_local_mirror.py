@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from Core_SQL_Connection_and_Query import DimensionCache, fetch_template_data
+from Local_Mirror import LocalMirror
+from Report_Aggregates import summarise_productivity
+
+COMPARED = [
+    "Total Non-Exempt Hours On Schedule",
+    "Total Exempt Hours on Schedule",
+    "Total Number of Kept Appointments",
+    "Total Productivity",
+]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    return LocalMirror(str(tmp_path / "mirror.sqlite"))
+
+
+def test_weekly_summary_matches_summarise_productivity(engine, mirror, tmp_path):
+    # Dr B has kept appointments in the 2025-01-13 week but no schedule there;
+    # Dr A's 2025-01-13 week has no exempt time and the 2024-12-30 week has no appointments
+    appts = pd.DataFrame({
+        "Res Name": ["Dr A"] * 20 + ["Dr A"] * 25 + ["Dr B"] * 25 + ["Dr B"] * 5,
+        "Appt Dt": ["20250107"] * 20 + ["20250121"] * 25 + ["20250107"] * 25 + ["20250114"] * 5,
+    })
+    appt_file = tmp_path / "NG Kept Appointments.xlsx"
+    appts.to_excel(appt_file, index=False)
+
+    mirror.sync_templates("2024-12-30", "2025-01-26", source_engine=engine)
+    mirror.load_appointments(appt_file)
+    actual = mirror.weekly_summary("2024-12-30", "2025-01-20").set_index(["Provider", "ISO Week"])
+
+    templates = fetch_template_data(engine, "20241230", "20250126", DimensionCache())
+    expected = summarise_productivity(templates, appts)
+    expected["ISO Week"] = (
+        expected["ISO Year"].astype(str) + "-W" + expected["ISoweek_start_date"].astype(str).str.zfill(2)
+    )
+    expected = expected.set_index(["Provider", "ISO Week"])
+
+    assert sorted(actual.index) == sorted(expected.index)
+    assert ("Dr B", "2025-W03") in actual.index
+    for column in COMPARED:
+        pd.testing.assert_series_equal(
+            actual[column].astype("float64").sort_index(),
+            expected[column].astype("float64").sort_index(),
+            check_names=False,
+        )
+    assert pd.isna(actual.loc[("Dr A", "2025-W03"), "Total Exempt Hours on Schedule"])
+    assert pd.isna(actual.loc[("Dr B", "2025-W03"), "Total Productivity"])
+    assert pd.isna(actual.loc[("Dr A", "2025-W01"), "Total Number of Kept Appointments"])
+
+
+@pytest.fixture
+def weekly_mirror(mirror):
+    week_starts = pd.date_range("2024-09-02", "2025-01-20", freq="7D")
+    pd.DataFrame({
+        "provider": "Dr A",
+        "category": "Office Visit",
+        "prevent_appts_ind": "N",
+        "week_start_date": week_starts.strftime("%Y-%m-%d"),
+        "week_end_date": (week_starts + pd.Timedelta(days=6)).strftime("%Y-%m-%d"),
+        "iso_week": [f"{d.isocalendar()[0]}-W{d.isocalendar()[1]:02d}" for d in week_starts],
+        "duration": 600.0,
+    }).to_sql("template_schedule", mirror.engine, if_exists="append", index=False)
+    return mirror
+
+
+@pytest.mark.parametrize("as_of, last_week", [
+    ("2025-01-22", "2025-01-13"),  # Wednesday: the 2025-01-20 week is still in progress
+    ("2025-01-26", "2025-01-13"),  # Sunday: 2025-01-20 week ends today, not finished yet
+    ("2025-01-27", "2025-01-20"),  # Monday after: 2025-01-20 week is complete
+])
+def test_trailing_weeks_returns_last_n_complete_weeks(weekly_mirror, as_of, last_week):
+    df = weekly_mirror.trailing_weeks(13, as_of=as_of)
+    assert len(df) == 13
+    assert df["week_start_date"].max() == last_week
+
+
+def test_trailing_weeks_include_current(weekly_mirror):
+    df = weekly_mirror.trailing_weeks(13, as_of="2025-01-22", include_current=True)
+    assert len(df) == 13
+    assert df["week_start_date"].max() == "2025-01-20"
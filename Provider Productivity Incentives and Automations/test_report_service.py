@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from Core_SQL_Connection_and_Query import DimensionCache, fetch_template_data
+from Report_Aggregates import calculate_incentives, summarise_hours, summarise_productivity
+import Report_Service
+from Report_Service import ReportCache, ReportService, fetch_report, make_server
+
+OLD_FIVE_WAY_JOIN = """
+SELECT e.category, r.week_start_date, r.week_end_date, c.create_timestamp AS [Date Appt Was Created],
+       e.prevent_appts_ind AS [Prevent Appointments?], c.duration, t.template, y.description AS [Provider]
+FROM template_members c
+INNER JOIN appt_templates t ON t.appt_template_id = c.appt_template_id
+INNER JOIN categories e ON e.category_id = c.category_id
+INNER JOIN resource_templates r ON r.appt_template_id = t.appt_template_id
+INNER JOIN resources y ON y.resource_id = r.resource_id
+WHERE r.week_start_date BETWEEN '20241201' AND '20250131'
+"""
+
+
+def test_fetch_template_data_matches_old_inner_join(engine):
+    expected = pd.read_sql(OLD_FIVE_WAY_JOIN, engine)
+    actual = fetch_template_data(engine, "20241201", "20250131", DimensionCache())
+
+    columns = list(expected.columns)
+    as_rows = lambda df: sorted(df[columns].astype(str).itertuples(index=False, name=None))
+    assert as_rows(actual) == as_rows(expected)
+    assert len(actual) == 8
+
+
+def test_report_cache_coalesces_concurrent_identical_requests():
+    cache = ReportCache()
+    calls = []
+    start = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "report"
+
+    def request():
+        start.wait()
+        results.append(cache.get_or_compute(("templates", "20250101", "20250119"), compute))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["report"] * 8
+
+
+def test_exempt_split_follows_r_rules(engine):
+    hours = summarise_hours(fetch_template_data(engine, "20250106", "20250112", DimensionCache()))
+    dr_a = hours[hours["Provider"] == "Dr A"].iloc[0]
+
+    # Office Visit 480 + Charting Time 60 are non-exempt; Vacation 120 is exempt; Administrative Time is neither
+    assert dr_a["Total Non-Exempt Hours On Schedule"] == 9.0
+    assert dr_a["Total Exempt Hours on Schedule"] == 2.0
+
+
+def test_calculate_incentives_matches_hand_computed_case(engine):
+    templates = fetch_template_data(engine, "20241201", "20250131", DimensionCache())
+    appts = pd.DataFrame({
+        "Res Name": ["Dr A"] * 20 + ["Dr A"] * 20 + ["Dr A"] * 25 + ["Dr B"] * 25,
+        "Appt Dt": ["20250107"] * 20 + ["20250114"] * 20 + ["20250121"] * 25 + ["20250107"] * 25,
+    })
+    specialty = pd.DataFrame({
+        "Provider": ["Dr A", "Dr B"],
+        "Provider Specialty": ["FM", "Peds"],
+        "Productivity Target?": [2.2, 2.0],
+    })
+    productivity = summarise_productivity(templates, appts)
+
+    at_2_2 = calculate_incentives(productivity, specialty, "2025-01-06").set_index(["Provider", "Two_Week_Label"])
+    at_2_0 = calculate_incentives(productivity, specialty, "2025-01-06", 2.0).set_index(["Provider", "Two_Week_Label"])
+
+    # The 2024-12-30 week falls in group 0 and is excluded
+    assert set(at_2_2.index.get_level_values("Two_Week_Label")) == {
+        "Period 1: 2025-01-06 to 2025-01-20",
+        "Period 2: 2025-01-20 to 2025-01-27",
+    }
+
+    # Dr A period 1: 9h + 9h non-exempt, 40 kept; 18h * 2.2 = 39.6 needed -> round(0.4) = 0 -> $0
+    period_1 = at_2_2.loc[("Dr A", "Period 1: 2025-01-06 to 2025-01-20")]
+    assert period_1["Total Non-Exempt Hours On Schedule"] == 18.0
+    assert period_1["Encounters Needed To Hit Goal at Prod Target"] == pytest.approx(39.6)
+    assert period_1["Incentive Payment"] == 0
+
+    # Dr A period 2: 10h, 25 kept; 22 needed -> 3 over -> $30
+    assert at_2_2.loc[("Dr A", "Period 2: 2025-01-20 to 2025-01-27"), "Incentive Payment"] == 30
+
+    # 2.0 workbook recodes Dr A's 2.2 target: 18h * 2.0 = 36 needed -> 4 over -> $40
+    assert at_2_0.loc[("Dr A", "Period 1: 2025-01-06 to 2025-01-20"), "Productivity Target?"] == 2.0
+    assert at_2_0.loc[("Dr A", "Period 1: 2025-01-06 to 2025-01-20"), "Incentive Payment"] == 40
+
+    # Dr B already at 2.0 is unchanged: 10h * 2.0 = 20 needed, 25 kept -> $50
+    assert at_2_2.loc[("Dr B", "Period 1: 2025-01-06 to 2025-01-20"), "Incentive Payment"] == 50
+    assert at_2_0.loc[("Dr B", "Period 1: 2025-01-06 to 2025-01-20"), "Incentive Payment"] == 50
+
+
+# --- HTTP service against the SQLite stand-in ---
+@pytest.fixture
+def service_url(engine, tmp_path):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+    pd.DataFrame({"Res Name": ["Dr A"] * 20, "Appt Dt": ["20250107"] * 20}).to_excel(
+        input_dir / "NG Kept Appointments.xlsx", index=False
+    )
+    pd.DataFrame({"Provider": ["Dr A"], "Provider Specialty": ["FM"], "Productivity Target?": [2.2]}).to_excel(
+        input_dir / "Provider Specialties.xlsx", index=False
+    )
+    server = make_server(ReportService(engine, input_dir=str(input_dir)), host="127.0.0.1", port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("report", ["hours", "productivity", "incentive"])
+def test_empty_date_range_returns_empty_report(service_url, report):
+    query = "lower=2030-01-01&upper=2030-02-01&pay_period=2030-01-06"
+    with urllib.request.urlopen(f"{service_url}/{report}?{query}") as response:
+        assert response.status == 200
+        assert json.loads(response.read()) == []
+
+
+def test_unexpected_error_does_not_leak_details(service_url, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("pyodbc: [SBNC-sql] Login failed for user 'svc'")
+
+    monkeypatch.setattr(ReportService, "templates", fail)
+    with pytest.raises(urllib.error.HTTPError) as raised:
+        urllib.request.urlopen(f"{service_url}/templates?lower=2025-01-01&upper=2025-01-20")
+    assert raised.value.code == 500
+    body = raised.value.read().decode("utf-8")
+    assert "SBNC-sql" not in body and "Login failed" not in body
+
+
+@pytest.mark.parametrize("use_parquet", [True, False])
+def test_client_round_trip_matches_direct_fetch(engine, service_url, monkeypatch, use_parquet):
+    monkeypatch.setattr(Report_Service, "parquet_available", lambda: use_parquet)
+    direct = fetch_template_data(engine, "20250101", "20250119", DimensionCache())
+    via_service = fetch_report("templates", "2025-01-01", "2025-01-20", base_url=service_url)
+
+    pd.testing.assert_frame_equal(via_service, direct)
+    assert via_service["week_start_date"].tolist() == direct["week_start_date"].tolist()